@@ -38,6 +38,9 @@ class Settings(BaseSettings):
     PINECONE_ENV: Optional[str] = None
     PINECONE_INDEX: str = "maya2-session-memory"
     PINECONE_HOST: str = "https://maya-ityq2wh.svc.aped-4627-b74a.pinecone.io"
+    PINECONE_INDEX_HOST: Optional[str] = None  # Data-plane host for PINECONE_INDEX; skips describe_index when set
+    PINECONE_USE_GRPC: bool = True  # Prefer the gRPC data-plane client when pinecone-client[grpc] is installed
+    PINECONE_UPSERT_BYTES_PER_SEC: int = 40_000_000  # Client-side upsert budget per namespace (Pinecone limit ~50 MB/s)
     PINECONE_DIMENSIONS: int = 1536
     PINECONE_METRIC: str = "cosine"
     PINECONE_CLOUD: str = "aws"
@@ -139,6 +142,19 @@ class Settings(BaseSettings):
     MEMORY_STORAGE_ENABLED: bool = True
     MEMORY_CROSS_SESSION_ENABLED: bool = True
     MEMORY_AUTO_STORE_THRESHOLD: int = 10  # Minimum message length to auto-store
+
+    # In-process semantic cache in front of Pinecone queries
+    PINECONE_QUERY_CACHE_ENABLE: bool = True
+    PINECONE_QUERY_CACHE_THRESHOLD: float = 0.95  # cosine between query embeddings to count as a hit
+    PINECONE_QUERY_CACHE_MAX_SIZE: int = 2048
+    # Invalidation is per-process: writes made by Celery workers (bulk_upsert, re-embedding,
+    # distillation) and freshly upserted vectors Pinecone hasn't served yet reach this cache only
+    # through expiry, so the TTL bounds how stale a recall can be.
+    PINECONE_QUERY_CACHE_TTL_SECS: int = 300
+    PINECONE_MESSAGE_CACHE_THRESHOLD: float = 0.40  # query-to-message cosine for the message document cache
+    # Answer query_similar_texts from messages this process has seen instead of Pinecone. Off by default:
+    # the local set is only the recent messages one worker upserted or fetched, not the full history.
+    PINECONE_MESSAGE_CACHE_SERVE: bool = False
     
     # Advanced emotion settings
     ADV_EMOTION_ENABLE: bool = False
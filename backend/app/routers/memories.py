@@ -500,12 +500,13 @@ async def delete_memories(user_id: str, current_user: dict = Depends(get_current
 
     # Delete Pinecone vectors by user prefix: not directly supported via prefix; require filter delete
     try:
-        if pinecone_service.is_ready():
-            idx = pinecone_service.get_index()
+        if pinecone_service.pinecone_service.is_ready():
+            idx = pinecone_service.pinecone_service.get_index()
             if idx:
                 idx.delete(filter={"user_id": {"$eq": user_id}})
     except Exception:
         pass
+    pinecone_service.invalidate_user_cache(user_id)
 
     # Delete Neo4j user node and relationships
     try:
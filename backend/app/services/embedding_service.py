@@ -1,5 +1,6 @@
 import time
 import logging
+from functools import lru_cache
 from app.config import settings
 # ✅ Correct imports
 from app.services import gemini_service, cohere_service
@@ -15,6 +16,15 @@ EMBEDDING_PROVIDERS = [
     # Only Gemini is supported for consistent 768-dimensional embeddings
 ]
 
+# Batch-capable counterparts of EMBEDDING_PROVIDERS (one request per sub-batch).
+# Separate names so a failed batch call doesn't put the single-text fallback in cooldown.
+BATCH_EMBEDDING_PROVIDERS = [
+    ("gemini_batch", gemini_service.create_embedding_batch),
+]
+
+# Texts per provider request; keeps each call well under provider input/token limits
+EMBEDDING_BATCH_SIZE = 96
+
 def is_provider_available(name: str) -> bool:
     """Check if a provider is available (i.e., not in failure timeout)."""
     failure_time = FAILED_PROVIDERS.get(name)
@@ -47,3 +57,67 @@ def create_embedding(text: str) -> list[float] | None:
 
     logger.critical("🚨 All compatible embedding providers failed.")
     return None
+
+
+def _embed_sub_batch(texts: list[str]) -> list[list[float]] | None:
+    """Embed one sub-batch with the first available batch provider, or return None."""
+    for name, provider_func in BATCH_EMBEDDING_PROVIDERS:
+        if not is_provider_available(name):
+            continue
+        try:
+            logger.info(f"[Embedding] Trying batch provider '{name}' for {len(texts)} texts.")
+            embeddings = provider_func(texts)
+            if not embeddings or len(embeddings) != len(texts):
+                raise ValueError(
+                    f"Invalid batch received from {name}. Count: {len(embeddings) if embeddings else 'None'}"
+                )
+            for embedding in embeddings:
+                if not embedding or len(embedding) != 768:
+                    raise ValueError(
+                        f"Invalid embedding received from {name}. Dimension: {len(embedding) if embedding else 'None'}"
+                    )
+            FAILED_PROVIDERS.pop(name, None)
+            return embeddings
+        except Exception as e:
+            logger.error(f"[Embedding] Batch provider '{name}' failed: {e}")
+            FAILED_PROVIDERS[name] = time.time()
+    return None
+
+
+def create_embedding_batch(texts: list[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> list[list[float] | None]:
+    """
+    Creates embeddings for many texts with one provider request per sub-batch.
+    The result is aligned with `texts`; entries that could not be embedded are None.
+    A failed sub-batch is retried one text at a time via `create_embedding`.
+    """
+    results: list[list[float] | None] = []
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start:start + batch_size]
+        embeddings = _embed_sub_batch(chunk)
+        if embeddings is None:
+            logger.warning(f"[Embedding] Sub-batch of {len(chunk)} failed; retrying texts individually.")
+            embeddings = [create_embedding(text) for text in chunk]
+        results.extend(embeddings)
+    return results
+
+
+@lru_cache(maxsize=512)
+def _cached_query_embedding(text: str) -> tuple[float, ...]:
+    embedding = create_embedding(text)
+    if not embedding:
+        # Raising keeps failures out of the LRU cache so the next call retries
+        raise ValueError("embedding unavailable")
+    return tuple(embedding)
+
+
+def get_query_embedding(text: str) -> list[float] | None:
+    """
+    Embedding for a query text, memoized by text (LRU, 512 entries) so the
+    several Pinecone lookups made for one user message share a single provider call.
+    """
+    if not text:
+        return None
+    try:
+        return list(_cached_query_embedding(text))
+    except ValueError:
+        return None
@@ -9,6 +9,7 @@ from datetime import datetime
 import json
 
 from app.services.enhanced_pinecone_service import enhanced_pinecone_service
+from app.services.pinecone_service import invalidate_user_cache
 from app.services.enhanced_neo4j_service import enhanced_neo4j_service
 from app.services import memory_store
 
@@ -273,6 +274,7 @@ class EnhancedMemoryService:
         """Delete a memory from Pinecone."""
         try:
             success = self.pinecone.delete_user_memory(user_id, memory_id)
+            invalidate_user_cache(user_id)
             
             if success:
                 logger.info(f"✅ Deleted memory: {memory_id}")
@@ -289,6 +291,7 @@ class EnhancedMemoryService:
         try:
             # Delete from Pinecone
             pinecone_success = self.pinecone.delete_user_fact(user_id, fact_text)
+            invalidate_user_cache(user_id)
             
             # Delete from Neo4j
             neo4j_success = await self.neo4j.delete_relationship(user_id, "HAS_FACT", fact_text)
@@ -311,6 +314,7 @@ class EnhancedMemoryService:
             
             # Delete from Pinecone
             pinecone_success = self.pinecone.delete_user_namespace(user_id)
+            invalidate_user_cache(user_id)
             
             if neo4j_success and pinecone_success:
                 logger.info(f"✅ Deleted user: {user_id}")
@@ -54,4 +54,29 @@ def create_embedding(text: str) -> list[float]:
             print(f"⚠️ Gemini embedding key at index {current_gemini_key_index} failed: {e}")
             current_gemini_key_index = (current_gemini_key_index + 1) % len(gemini_keys)
             if current_gemini_key_index == start_index:
-                raise RuntimeError(f"All Gemini API keys failed for embeddings. Last error: {e}")
\ No newline at end of file
+                raise RuntimeError(f"All Gemini API keys failed for embeddings. Last error: {e}")
+
+
+def create_embedding_batch(texts: list[str]) -> list[list[float]]:
+    """Creates embeddings for several texts in one text-embedding-004 request, rotating keys on failure."""
+    if not gemini_keys:
+        raise ConnectionError("Gemini API keys are not configured.")
+
+    global current_gemini_key_index
+    start_index = current_gemini_key_index
+
+    while True:
+        try:
+            key_to_try = gemini_keys[current_gemini_key_index]
+            genai.configure(api_key=key_to_try)
+            result = genai.embed_content(
+                model="models/text-embedding-004",
+                content=list(texts),
+                task_type="retrieval_document"
+            )
+            return result['embedding']
+        except Exception as e:
+            print(f"⚠️ Gemini batch embedding key at index {current_gemini_key_index} failed: {e}")
+            current_gemini_key_index = (current_gemini_key_index + 1) % len(gemini_keys)
+            if current_gemini_key_index == start_index:
+                raise RuntimeError(f"All Gemini API keys failed for batch embeddings. Last error: {e}")
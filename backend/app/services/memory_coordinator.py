@@ -27,6 +27,7 @@ import asyncio
 import time
 
 from app.services import pinecone_service, profile_service
+from app.services.embedding_service import get_query_embedding
 from app.services.neo4j_service import neo4j_service
 from app.services import redis_service as redis_async_service  # may be None in some envs
 from app.services import memory_store
@@ -154,21 +155,24 @@ async def gather_memory_context(
     semantic_time_ms: float = 0.0
     try:
         start_sem = time.time()
+        # One query embedding shared by the three lookups below; skipped while Pinecone is
+        # unavailable, since the lookups return early without using it
+        query_emb = get_query_embedding(latest_user_message) if pinecone_service.pinecone_service.is_ready() else None
         
         # Query similar texts from message history
         pinecone_context = pinecone_service.query_similar_texts(
-            user_id=user_id, text=latest_user_message, top_k=top_k_semantic
+            user_id=user_id, text=latest_user_message, top_k=top_k_semantic, precomputed_embedding=query_emb
         )
         
         # Query user facts and memories
         user_fact_snippets = pinecone_service.query_user_facts(
-            user_id=user_id, hint_text=latest_user_message, top_k=top_k_user_facts
+            user_id=user_id, hint_text=latest_user_message, top_k=top_k_user_facts, precomputed_embedding=query_emb
         )
         
         # Also query structured memories for better context
         try:
             memory_matches = pinecone_service.query_user_memories(
-                user_id=user_id, query_text=latest_user_message, top_k=5
+                user_id=user_id, query_text=latest_user_message, top_k=5, precomputed_embedding=query_emb
             )
             if memory_matches:
                 memory_contexts = [m.get("text", "") for m in memory_matches if m.get("text")]
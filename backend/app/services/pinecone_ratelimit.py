@@ -0,0 +1,114 @@
+"""
+Client-side throttling for Pinecone upserts.
+
+Pinecone rejects upserts above ~50 MB/s per namespace with RESOURCE_EXHAUSTED
+(HTTP 429). A per-namespace token bucket of request bytes keeps parallel
+upserts under that budget, and call_with_backoff retries the rejections that
+still get through with exponential backoff plus jitter.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rate-limit markers in exception text (gRPC status name, HTTP 429 reason phrase)
+_RATE_LIMIT_TEXT = re.compile(r"\bRESOURCE_EXHAUSTED\b|\bToo Many Requests\b")
+
+
+class TokenBucket:
+    """Thread-safe token bucket; tokens are bytes, refilled continuously per second."""
+
+    def __init__(self, capacity: float, refill_per_sec: float):
+        self.capacity = float(capacity)
+        self.refill_per_sec = float(refill_per_sec)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_sec)
+        self._updated = now
+
+    def acquire(self, amount: float) -> None:
+        """Block until `amount` tokens are available, then take them."""
+        amount = min(float(amount), self.capacity)  # oversized requests wait for a full bucket
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.refill_per_sec
+            time.sleep(wait)
+
+    @contextmanager
+    def reserve(self, amount: float):
+        self.acquire(amount)
+        yield
+
+
+_buckets: Dict[Optional[str], TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket_for(namespace: Optional[str]) -> TokenBucket:
+    """Return the shared upsert bucket for a namespace (None = default namespace)."""
+    with _buckets_lock:
+        bucket = _buckets.get(namespace)
+        if bucket is None:
+            rate = settings.PINECONE_UPSERT_BYTES_PER_SEC
+            bucket = TokenBucket(capacity=rate, refill_per_sec=rate)
+            _buckets[namespace] = bucket
+        return bucket
+
+
+def _grpc_code_name(exc: BaseException) -> Optional[str]:
+    """Status code name of a grpc.RpcError (e.g. "RESOURCE_EXHAUSTED"), else None."""
+    code = getattr(exc, "code", None)
+    if not callable(code):
+        return None
+    try:
+        return getattr(code(), "name", None)
+    except Exception:  # noqa: BLE001
+        return None
+
+
+def is_resource_exhausted(exc: BaseException) -> bool:
+    """True for Pinecone rate-limit rejections from either the REST or gRPC client.
+
+    gRPC futures raise PineconeException(debug_error_string) with the RpcError
+    chained as __cause__, so the chain is checked for the status code too.
+    """
+    seen = set()
+    err: Optional[BaseException] = exc
+    while err is not None and id(err) not in seen:
+        seen.add(id(err))
+        if getattr(err, "status", None) == 429 or _grpc_code_name(err) == "RESOURCE_EXHAUSTED":
+            return True
+        err = err.__cause__ or err.__context__
+    return _RATE_LIMIT_TEXT.search(str(exc)) is not None
+
+
+def call_with_backoff(fn: Callable[..., Any], *args, retries: int = 5, base_delay: float = 0.5, max_delay: float = 8.0, **kwargs) -> Any:
+    """Call fn, retrying rate-limit rejections with full-jitter exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:  # noqa: BLE001
+            if attempt >= retries or not is_resource_exhausted(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            logger.debug(f"Pinecone rate limited (attempt {attempt + 1}); retrying in {delay:.2f}s")
+            time.sleep(delay)
+
+
+__all__ = ["TokenBucket", "bucket_for", "is_resource_exhausted", "call_with_backoff"]
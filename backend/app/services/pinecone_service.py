@@ -1,9 +1,16 @@
 # backend/app/services/pinecone_service.py
 
+import hashlib
+import importlib
+import itertools
 import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Any, List, Dict, Tuple
 from app.config import settings
-from app.services.embedding_service import create_embedding
+from app.services.embedding_service import create_embedding, create_embedding_batch, get_query_embedding
+from app.services import pinecone_ratelimit
+from app.services.semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
@@ -12,9 +19,42 @@ logger = logging.getLogger(__name__)
 # =====================================================
 pc: Optional[Any] = None
 index = None
+# Data-plane host resolved once via describe_index (or settings.PINECONE_INDEX_HOST)
+_INDEX_HOST: Optional[str] = None
+# (Vector proto class, dict -> Struct converter) when bound through the gRPC client
+_GRPC_VECTOR: Optional[Tuple[Any, Any]] = None
 PINECONE_INDEX_NAME = settings.PINECONE_INDEX or "maya2-session-memory"
 # This dimension MUST match your embedding model. Updated to 1536 for the new Pinecone index.
 REQUIRED_DIMENSION = 1536
+# Vectors per upsert request and worker threads used to send them concurrently
+UPSERT_BATCH_SIZE = 100
+INDEX_POOL_THREADS = 30
+# bulk_upsert pipeline: texts embedded per producer step and embedded batches buffered for the upsert stage
+PIPELINE_EMBED_CHUNK = 256
+PIPELINE_QUEUE_DEPTH = 4
+# IDs per delete request (Pinecone accepts up to 1000)
+DELETE_BATCH_SIZE = 1000
+# Memory lifecycle states eligible for recall
+LIVE_LIFECYCLE_STATES = ["active", "candidate", "distilled"]
+# Message vector id builder: user_id:session_id:timestamp:role (fields may be non-str, so format rather than join)
+_MESSAGE_ID_FMT = "{}:{}:{}:{}".format
+
+# Query results keyed by query embedding; partitions are (namespace, kind, top_k)
+_query_cache = SemanticCache(
+    threshold=settings.PINECONE_QUERY_CACHE_THRESHOLD,
+    max_size=settings.PINECONE_QUERY_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PINECONE_QUERY_CACHE_TTL_SECS,
+)
+# Message texts keyed by their own (document) embeddings; partitions are (namespace, "message").
+# Keying on documents rather than queries keeps distinct follow-up questions from collapsing
+# onto one cached answer. Only used with PINECONE_MESSAGE_CACHE_SERVE, since it holds just the
+# messages this process has seen and would otherwise shadow older, more relevant history.
+_message_doc_cache = SemanticCache(
+    threshold=settings.PINECONE_MESSAGE_CACHE_THRESHOLD,
+    max_size=settings.PINECONE_QUERY_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PINECONE_QUERY_CACHE_TTL_SECS,
+    dedup_threshold=0.95,
+)
 
 # =====================================================
 # 🔹 Initialize Pinecone
@@ -23,8 +63,14 @@ def initialize_pinecone():
     """
     Initializes the Pinecone client and index. Called once on app startup.
     It will automatically delete and recreate the index if the dimension is wrong.
+    Idempotent: once an index is bound, later calls (e.g. per Celery batch) reuse it,
+    so its client, connection and upsert thread pool are created only once.
+    The index is bound by host; once the host is known (configured or cached),
+    the list/describe control-plane calls are skipped on re-initialization.
     """
-    global pc, index
+    global pc, index, _INDEX_HOST, _GRPC_VECTOR
+    if index is not None:
+        return
     if not settings.PINECONE_API_KEY:
         logger.warning("⚠️ Pinecone API key not found. Pinecone service will be disabled.")
         return
@@ -34,9 +80,16 @@ def initialize_pinecone():
         try:
             from pinecone import Pinecone, ServerlessSpec  # type: ignore
             sdk_version = "v3"
+            transport = "rest"
+            if settings.PINECONE_USE_GRPC:
+                # gRPC data plane (HTTP/2 + protobuf); needs the pinecone-client[grpc] extra
+                try:
+                    from pinecone.grpc import PineconeGRPC as Pinecone  # type: ignore
+                    transport = "grpc"
+                except Exception as grpc_err:  # noqa: BLE001
+                    logger.info(f"Pinecone gRPC client unavailable, using REST: {grpc_err}")
             pc_obj = Pinecone(api_key=settings.PINECONE_API_KEY)
         except Exception as v3_err:  # noqa: BLE001
-            import importlib
             try:
                 pinecone_mod = importlib.import_module("pinecone")  # type: ignore
             except Exception as import_err:  # noqa: BLE001
@@ -55,6 +108,7 @@ def initialize_pinecone():
                         environment=(settings.PINECONE_ENVIRONMENT or "us-east-1"),
                     )
                     sdk_version = "v2"
+                    transport = "rest"
                     pc_obj = pinecone_mod
                 except Exception as v2_err:  # noqa: BLE001
                     raise RuntimeError(
@@ -72,25 +126,36 @@ def initialize_pinecone():
         create_new_index = False
 
         if sdk_version == "v3":
-            existing = pc_obj.list_indexes()
-            existing_names = existing.names() if hasattr(existing, "names") else [getattr(i, "name", None) for i in existing or []]
-            if PINECONE_INDEX_NAME in existing_names:
-                index_description = pc_obj.describe_index(PINECONE_INDEX_NAME)
-                dim = getattr(index_description, "dimension", None) or (index_description.get("dimension") if isinstance(index_description, dict) else None)
-                if dim != REQUIRED_DIMENSION:
-                    logger.warning(f"Index '{PINECONE_INDEX_NAME}' wrong dimension {dim}; recreating")
-                    pc_obj.delete_index(PINECONE_INDEX_NAME)
+            host = settings.PINECONE_INDEX_HOST or _INDEX_HOST
+            if not host:
+                existing = pc_obj.list_indexes()
+                existing_names = existing.names() if hasattr(existing, "names") else [getattr(i, "name", None) for i in existing or []]
+                index_description = None
+                if PINECONE_INDEX_NAME in existing_names:
+                    index_description = pc_obj.describe_index(PINECONE_INDEX_NAME)
+                    dim = getattr(index_description, "dimension", None) or (index_description.get("dimension") if isinstance(index_description, dict) else None)
+                    if dim != REQUIRED_DIMENSION:
+                        logger.warning(f"Index '{PINECONE_INDEX_NAME}' wrong dimension {dim}; recreating")
+                        pc_obj.delete_index(PINECONE_INDEX_NAME)
+                        create_new_index = True
+                else:
                     create_new_index = True
-            else:
-                create_new_index = True
-            if create_new_index:
-                pc_obj.create_index(
-                    name=PINECONE_INDEX_NAME,
-                    dimension=REQUIRED_DIMENSION,
-                    metric="cosine",
-                    spec=ServerlessSpec(cloud="aws", region=settings.PINECONE_REGION),
-                )
-            bound_index = pc_obj.Index(PINECONE_INDEX_NAME)
+                if create_new_index:
+                    pc_obj.create_index(
+                        name=PINECONE_INDEX_NAME,
+                        dimension=REQUIRED_DIMENSION,
+                        metric="cosine",
+                        spec=ServerlessSpec(cloud="aws", region=settings.PINECONE_REGION),
+                    )
+                    index_description = pc_obj.describe_index(PINECONE_INDEX_NAME)
+                host = getattr(index_description, "host", None) or (index_description.get("host") if isinstance(index_description, dict) else None)
+                _INDEX_HOST = host
+            index_target = {"host": host} if host else {"name": PINECONE_INDEX_NAME}
+            try:
+                bound_index = pc_obj.Index(pool_threads=INDEX_POOL_THREADS, **index_target)
+            except TypeError:
+                # Index classes without a pool_threads option (some gRPC client versions)
+                bound_index = pc_obj.Index(**index_target)
         else:  # v2
             # v2 uses list_indexes() -> list, describe_index(index_name) returns dict with 'dimension'
             existing = pc_obj.list_indexes() or []
@@ -107,14 +172,25 @@ def initialize_pinecone():
                 pc_obj.create_index(PINECONE_INDEX_NAME, dimension=REQUIRED_DIMENSION, metric="cosine")
             bound_index = pc_obj.Index(PINECONE_INDEX_NAME)
 
+        grpc_vector = None
+        if transport == "grpc":
+            try:
+                from pinecone.grpc import Vector as GRPCVector  # type: ignore
+                from pinecone.grpc.utils import dict_to_proto_struct  # type: ignore
+                grpc_vector = (GRPCVector, dict_to_proto_struct)
+            except Exception as proto_err:  # noqa: BLE001
+                logger.debug(f"gRPC Vector proto unavailable; upserting tuples: {proto_err}")
+
         # Assign globals
         pc = pc_obj
         index = bound_index
-        logger.info(f"✅ Pinecone index ready: '{PINECONE_INDEX_NAME}' (sdk {sdk_version})")
+        _GRPC_VECTOR = grpc_vector
+        logger.info(f"✅ Pinecone index ready: '{PINECONE_INDEX_NAME}' (sdk {sdk_version}, {transport})")
     except Exception as e:  # noqa: BLE001
         logger.error(f"❌ Error initializing Pinecone: {e}")
         pc = None
         index = None
+        _GRPC_VECTOR = None
 
 # =====================================================
 # 🔹 Internal Helper: Ensure Index Ready
@@ -126,6 +202,150 @@ def _ensure_index_ready():
         initialize_pinecone()
     return index is not None
 
+# =====================================================
+# 🔹 Internal Helper: Normalize Query Responses
+# =====================================================
+def _normalize_matches(res: Any) -> List[Tuple[Optional[float], Dict[str, Any]]]:
+    """Return (score, metadata) pairs from an SDK response object or a plain dict.
+
+    The response shape is checked once; matches are then unpacked uniformly.
+    """
+    if res is None:
+        return []
+    matches = res.get("matches") if isinstance(res, dict) else getattr(res, "matches", None)
+    if not matches:
+        return []
+    if isinstance(matches[0], dict):
+        return [(m.get("score"), m.get("metadata") or {}) for m in matches]
+    return [(m.score, m.metadata or {}) for m in matches]
+
+
+def _match_values(res: Any) -> List[Optional[List[float]]]:
+    """Vector values of each match (aligned with _normalize_matches), for include_values queries."""
+    if res is None:
+        return []
+    matches = res.get("matches") if isinstance(res, dict) else getattr(res, "matches", None)
+    if not matches:
+        return []
+    if isinstance(matches[0], dict):
+        return [m.get("values") or None for m in matches]
+    return [getattr(m, "values", None) or None for m in matches]
+
+# =====================================================
+# 🔹 Internal Helper: Semantic Query Cache
+# =====================================================
+def _cache_get(partition: Tuple[Any, ...], embedding):
+    """Return a cached query result (lists are copied so callers may mutate them)."""
+    if not settings.PINECONE_QUERY_CACHE_ENABLE:
+        return None
+    cached = _query_cache.get(partition, embedding)
+    return list(cached) if isinstance(cached, list) else cached
+
+
+def _cache_set(partition: Tuple[Any, ...], embedding, result) -> None:
+    if not settings.PINECONE_QUERY_CACHE_ENABLE or result is None:
+        return
+    _query_cache.set(partition, embedding, list(result) if isinstance(result, list) else result)
+
+
+def _message_cache_serving() -> bool:
+    return bool(settings.PINECONE_QUERY_CACHE_ENABLE and settings.PINECONE_MESSAGE_CACHE_SERVE)
+
+
+def _remember_message_docs(namespace: Optional[str], vectors: List[Tuple[str, Any, Dict[str, Any]]]) -> None:
+    """Add upserted/fetched message vectors to the document cache (when it serves queries)."""
+    if not _message_cache_serving() or not namespace:
+        return
+    for _, values, meta in vectors:
+        if values is not None and meta.get("kind") == "message" and meta.get("text"):
+            _message_doc_cache.set((namespace, "message"), values, meta["text"])
+
+
+def _invalidate_caches(namespace: Optional[str], kind: Optional[str] = None) -> None:
+    """Drop cached query results and message documents after deletes."""
+    _query_cache.invalidate(namespace, kind)
+    if kind in (None, "message"):
+        _message_doc_cache.invalidate(namespace, "message")
+
+
+def invalidate_user_cache(user_id: str) -> None:
+    """Drop this process's cached Pinecone results for a user.
+
+    For deletes that bypass this module's helpers (filter deletes on the raw
+    index, enhanced_pinecone_service).
+    """
+    _invalidate_caches(f"user:{user_id}")
+
+# =====================================================
+# 🔹 Internal Helper: Chunked Parallel Upserts
+# =====================================================
+def _chunks(iterable, batch_size: int = UPSERT_BATCH_SIZE):
+    """Yield successive lists of at most batch_size items from iterable."""
+    it = iter(iterable)
+    chunk = list(itertools.islice(it, batch_size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(it, batch_size))
+
+
+def _approx_upsert_bytes(vectors: List[Any]) -> int:
+    """Rough request size used for rate limiting: fp32 values plus a metadata allowance."""
+    return len(vectors) * (REQUIRED_DIMENSION * 4 + 256)
+
+
+def _await_async_result(result: Any) -> Any:
+    """Wait on an async_req result: REST returns ApplyResult (.get), gRPC a future (.result)."""
+    getter = getattr(result, "get", None) or getattr(result, "result", None)
+    return getter() if callable(getter) else result
+
+
+def _wire_vector(vid: str, values: List[Any], meta: Dict[str, Any]) -> Any:
+    """Upsert record in the transport's native form: a gRPC Vector proto, else an (id, values, metadata) tuple."""
+    if _GRPC_VECTOR is not None:
+        vector_cls, to_struct = _GRPC_VECTOR
+        return vector_cls(id=vid, values=values, metadata=to_struct(meta))
+    return (vid, values, meta)
+
+
+def _upsert_chunk_sync(chunk: List[Any], kwargs: Dict[str, Any]) -> None:
+    try:
+        index.upsert(vectors=chunk, **kwargs)
+    except TypeError:
+        index.upsert(vectors=chunk)
+
+
+def _upsert_vectors(vectors: List[Tuple[str, Any, Dict[str, Any]]], namespace: Optional[str] = None) -> None:
+    """Upsert vectors in UPSERT_BATCH_SIZE chunks fired concurrently on the index thread pool.
+
+    Records are converted to the transport's wire type per chunk. Each chunk first
+    reserves its approximate byte size from the namespace's token bucket; chunks
+    rejected with RESOURCE_EXHAUSTED are retried with backoff.
+    """
+    kwargs = {"namespace": namespace} if namespace else {}
+    bucket = pinecone_ratelimit.bucket_for(namespace)
+    chunks = [
+        [_wire_vector(vid, values, meta) for vid, values, meta in chunk]
+        for chunk in _chunks(vectors, UPSERT_BATCH_SIZE)
+    ]
+    try:
+        pending = []
+        for chunk in chunks:
+            with bucket.reserve(_approx_upsert_bytes(chunk)):
+                pending.append((chunk, index.upsert(vectors=chunk, async_req=True, **kwargs)))
+    except TypeError:
+        # SDKs without async_req (or namespace) support: sequential chunked upserts
+        for chunk in chunks:
+            with bucket.reserve(_approx_upsert_bytes(chunk)):
+                pinecone_ratelimit.call_with_backoff(_upsert_chunk_sync, chunk, kwargs)
+        return
+    for chunk, r in pending:
+        try:
+            _await_async_result(r)
+        except Exception as e:  # noqa: BLE001
+            if not pinecone_ratelimit.is_resource_exhausted(e):
+                raise
+            pinecone_ratelimit.call_with_backoff(_upsert_chunk_sync, chunk, kwargs)
+
 # =====================================================
 # 🔹 Upsert Session Summary
 # =====================================================
@@ -138,6 +358,7 @@ def upsert_session_summary(session_id: str, summary: str):
         embedding = create_embedding(summary)
         if embedding:
             index.upsert(vectors=[(session_id, embedding, {"summary": summary})])
+            _query_cache.invalidate(None, "summary")
             logger.info(f"✅ Upserted summary for session {session_id}.")
     except Exception as e:
         logger.error(f"❌ Failed to upsert summary: {e}")
@@ -145,37 +366,29 @@ def upsert_session_summary(session_id: str, summary: str):
 # =====================================================
 # 🔹 Query Relevant Summary
 # =====================================================
-def query_relevant_summary(text: str, top_k: int = 1) -> str | None:
+def query_relevant_summary(text: str, top_k: int = 1, precomputed_embedding: Optional[List[float]] = None) -> str | None:
     """Finds the most relevant summary for a given text."""
     if not _ensure_index_ready():
         logger.error("❌ Pinecone index unavailable. Cannot query.")
         return None
     try:
-        embedding = create_embedding(text)
+        embedding = precomputed_embedding or get_query_embedding(text)
         if not embedding:
             logger.warning("⚠️ Failed to create embedding for query.")
             return None
-        
+        partition = (None, "summary", top_k)
+        cached = _cache_get(partition, embedding)
+        if cached is not None:
+            return cached
+
         results = index.query(vector=embedding, top_k=top_k, include_metadata=True)
-        matches = (
-            getattr(results, "matches", None)
-            if not isinstance(results, dict)
-            else results.get("matches", [])
-        )
-        if matches is None:
-            matches = []
+        matches = _normalize_matches(results)
         if matches:
-            best = matches[0]
-            score = getattr(best, "score", None)
-            md = getattr(best, "metadata", None)
-            if score is None and isinstance(best, dict):
-                score = best.get("score", 0)
-                md = best.get("metadata")
+            score, md = matches[0]
             if (score or 0) > 0.75 and md:
-                if isinstance(md, dict):
-                    return md.get("summary")
-                # Some SDKs may return metadata-like objects; fallback to str
-                return str(md)
+                summary = md.get("summary")
+                _cache_set(partition, embedding, summary)
+                return summary
         return None
     except Exception as e:
         logger.error(f"❌ Query to Pinecone failed: {e}")
@@ -188,6 +401,7 @@ class PineconeService:
     initialize_pinecone = staticmethod(initialize_pinecone)
     upsert_session_summary = staticmethod(upsert_session_summary)
     query_relevant_summary = staticmethod(query_relevant_summary)
+    invalidate_user_cache = staticmethod(invalidate_user_cache)
     @staticmethod
     def is_ready() -> bool:
         return index is not None
@@ -216,7 +430,7 @@ def upsert_message_embedding(user_id: str, session_id: str, text: str, role: str
         emb = create_embedding(text)
         if not emb:
             return
-        vid = f"{user_id}:{session_id}:{timestamp}:{role}"
+        vid = _MESSAGE_ID_FMT(user_id, session_id, timestamp, role)
         meta = {
             "user_id": user_id,
             "session_id": session_id,
@@ -232,25 +446,38 @@ def upsert_message_embedding(user_id: str, session_id: str, text: str, role: str
         except TypeError:
             # Older SDKs may not accept namespace named arg; fall back to default
             index.upsert(vectors=[(vid, emb, meta)])
+        _remember_message_docs(ns, [(vid, emb, meta)])
     except Exception as e:
         logger.debug(f"Pinecone message upsert failed: {e}")
 
 
+def _fact_id_prefix(user_id: str) -> str:
+    """Per-user part of fact vector ids; "b2:" marks BLAKE2b ids apart from legacy SHA-1 ones."""
+    return f"user:{user_id}:fact:b2:"
+
+
+def _fact_id_digest(fact_text: str, _blake2b=hashlib.blake2b) -> str:
+    return _blake2b(fact_text.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def _fact_vector_id(user_id: str, fact_text: str) -> str:
+    """Deterministic fact vector id: _fact_id_prefix(user_id) + BLAKE2b-48 of the text."""
+    return _fact_id_prefix(user_id) + _fact_id_digest(fact_text)
+
+
 def upsert_user_fact_embedding(user_id: str, fact_text: str, timestamp: str, category: str = "generic"):
     """Upsert a semantic embedding representing a stable user fact/preference.
 
-    ID format: user:{user_id}:fact:{hash_prefix}  (hash = deterministic over text)
+    ID format: user:{user_id}:fact:b2:{hash}  (hash = BLAKE2b-48 over text)
     Metadata includes scope/kind to allow filtered queries distinct from messages.
     """
     if not _ensure_index_ready() or not fact_text:
         return
     try:
-        import hashlib
         emb = create_embedding(fact_text)
         if not emb:
             return
-        h = hashlib.sha1(fact_text.encode("utf-8")).hexdigest()[:12]
-        vid = f"user:{user_id}:fact:{h}"
+        vid = _fact_vector_id(user_id, fact_text)
         meta = {
             "user_id": user_id,
             "session_id": "",  # not session-bound
@@ -265,34 +492,38 @@ def upsert_user_fact_embedding(user_id: str, fact_text: str, timestamp: str, cat
             index.upsert(vectors=[(vid, emb, meta)], namespace=ns)
         except TypeError:
             index.upsert(vectors=[(vid, emb, meta)])
+        _query_cache.invalidate(ns, "user_fact")
     except Exception as e:  # noqa: BLE001
         logger.debug(f"Pinecone user_fact upsert failed: {e}")
 
 
-def bulk_upsert(payloads: List[Dict[str, Any]]):
-    """Bulk upsert heterogeneous payloads from the embedding queue.
-
-    Supports kinds: message, user_fact
-    Each payload must contain: user_id, text, timestamp, kind.
-    """
-    if not _ensure_index_ready():
-        return
-    vectors: List[Tuple[str, List[float], Dict[str, Any]]] = []
-    try:
-        import hashlib
-        for item in payloads:
-            text = item.get("text")
-            if not text:
-                continue
-            emb = create_embedding(text)
-            if not emb:
-                continue
+def _embed_bulk_items(items: List[Dict[str, Any]]) -> List[Any]:
+    return create_embedding_batch([item["text"] for item in items])
+
+
+def _build_bulk_vectors(
+    items: List[Dict[str, Any]], embeddings: List[Any]
+) -> Dict[Optional[str], List[Tuple[str, Any, Dict[str, Any]]]]:
+    """Zip embedded queue payloads back with their metadata, grouped by target namespace."""
+    # Group by user so namespace / id prefix strings are built once per user
+    by_user: Dict[str, List[Tuple[Dict[str, Any], Any]]] = {}
+    for item, emb in zip(items, embeddings):
+        if emb:
+            by_user.setdefault(item.get("user_id", ""), []).append((item, emb))
+    # Hot-loop locals: skip module-global lookups per record
+    message_id = _MESSAGE_ID_FMT
+    fact_digest = _fact_id_digest
+    out: Dict[Optional[str], List[Tuple[str, Any, Dict[str, Any]]]] = {}
+    for user_id, group in by_user.items():
+        ns = f"user:{user_id}" if user_id else None
+        fact_prefix = _fact_id_prefix(user_id)
+        vectors = out.setdefault(ns, [])
+        for item, emb in group:
+            text = item["text"]
             kind = item.get("kind") or item.get("role") or "message"
-            user_id = item.get("user_id", "")
             ts = item.get("timestamp", "")
             if kind == "user_fact":
-                h = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
-                vid = f"user:{user_id}:fact:{h}"
+                vid = fact_prefix + fact_digest(text)
                 meta = {
                     "user_id": user_id,
                     "session_id": "",
@@ -305,7 +536,7 @@ def bulk_upsert(payloads: List[Dict[str, Any]]):
             else:
                 session_id = item.get("session_id", "")
                 role = item.get("role", "user")
-                vid = f"{user_id}:{session_id}:{ts}:{role}"
+                vid = message_id(user_id, session_id, ts, role)
                 meta = {
                     "user_id": user_id,
                     "session_id": session_id,
@@ -315,17 +546,59 @@ def bulk_upsert(payloads: List[Dict[str, Any]]):
                     "kind": "message",
                 }
             vectors.append((vid, emb, meta))
-        if vectors:
-            # Assume batch belongs to same user; compute namespace from first item, else default
-            first_user = next((it.get("user_id") for it in payloads if it.get("user_id")), "")
-            ns = f"user:{first_user}" if first_user else None
-            try:
-                if ns:
-                    index.upsert(vectors=vectors, namespace=ns)
-                else:
-                    index.upsert(vectors=vectors)
-            except TypeError:
-                index.upsert(vectors=vectors)
+    return out
+
+
+def _embed_stage(items: List[Dict[str, Any]], out_q: "queue.Queue") -> None:
+    """Producer: embed payloads chunk by chunk and queue (namespace, vectors) batches."""
+    try:
+        for chunk in _chunks(items, PIPELINE_EMBED_CHUNK):
+            for ns, vectors in _build_bulk_vectors(chunk, _embed_bulk_items(chunk)).items():
+                out_q.put((ns, vectors))
+    finally:
+        out_q.put(None)
+
+
+def _upsert_stage(in_q: "queue.Queue") -> None:
+    """Consumer: upsert queued batches until the producer's sentinel arrives."""
+    while True:
+        batch = in_q.get()
+        if batch is None:
+            return
+        ns, vectors = batch
+        try:
+            _upsert_vectors(vectors, namespace=ns)
+            _query_cache.invalidate(ns)
+            _remember_message_docs(ns, vectors)
+        except Exception as e:  # noqa: BLE001
+            # Keep draining so the producer never blocks on a full queue
+            logger.debug(f"bulk_upsert batch failed for ns={ns}: {e}")
+
+
+def bulk_upsert(payloads: List[Dict[str, Any]]):
+    """Bulk upsert heterogeneous payloads from the embedding queue.
+
+    Supports kinds: message, user_fact
+    Each payload must contain: user_id, text, timestamp, kind.
+    Large batches run as a two-stage pipeline: a producer thread embeds the
+    next chunk of texts while the caller's thread upserts the previous one.
+    """
+    if not _ensure_index_ready():
+        return
+    try:
+        items = [item for item in payloads if item.get("text")]
+        if len(items) <= PIPELINE_EMBED_CHUNK:
+            # Single chunk: nothing to overlap, skip the producer thread
+            for ns, vectors in _build_bulk_vectors(items, _embed_bulk_items(items)).items():
+                _upsert_vectors(vectors, namespace=ns)
+                _query_cache.invalidate(ns)
+                _remember_message_docs(ns, vectors)
+            return
+        batches: "queue.Queue" = queue.Queue(maxsize=PIPELINE_QUEUE_DEPTH)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            producer = pool.submit(_embed_stage, items, batches)
+            _upsert_stage(batches)
+            producer.result()
     except Exception as e:  # noqa: BLE001
         logger.debug(f"bulk_upsert failed: {e}")
 
@@ -338,55 +611,56 @@ __all__ = [
     "query_similar_texts",
     "query_user_facts",
     "bulk_upsert",
+    "invalidate_user_cache",
 ]
 
 
-def query_similar_texts(user_id: str, text: str, top_k: int = 3) -> Optional[str]:
+def query_similar_texts(user_id: str, text: str, top_k: int = 3, precomputed_embedding: Optional[List[float]] = None) -> Optional[str]:
     """
     Query Pinecone for the most similar prior messages for this user and return
     a compact concatenated context string (limited to a few items).
+    precomputed_embedding lets a caller reuse one query embedding across lookups.
     """
     if not _ensure_index_ready():
         return None
     if not text:
         return None
     try:
-        emb = create_embedding(text)
+        emb = precomputed_embedding or get_query_embedding(text)
         if not emb:
             return None
         # Restrict to this user's namespace and message-kind vectors
         ns = f"user:{user_id}"
+        serve_cached = _message_cache_serving()
+        if serve_cached:
+            # Served locally only when enough cached messages clear the query-to-document threshold
+            cached = _message_doc_cache.search((ns, "message"), emb, top_k)
+            if len(cached) >= top_k:
+                return "\n---\n".join(cached)
         kwargs = {
             "vector": emb,
             "top_k": top_k,
             "include_metadata": True,
             "filter": {"user_id": {"$eq": user_id}, "kind": {"$eq": "message"}},
         }
+        if serve_cached:
+            # Match values are only needed to remember the fetched messages locally
+            kwargs["include_values"] = True
         try:
             res = index.query(namespace=ns, **kwargs)
         except TypeError:
             res = index.query(**kwargs)
-        matches = (
-            getattr(res, "matches", None)
-            if not isinstance(res, dict)
-            else res.get("matches", [])
-        ) or []
-        snippets: list[str] = []
-        for m in matches:
-            md = getattr(m, "metadata", None)
-            if md is None and isinstance(m, dict):
-                md = m.get("metadata")
-            md = md or {}
-            snippet = md.get("text") if isinstance(md, dict) else None
-            if snippet:
-                snippets.append(snippet)
+        matches = _normalize_matches(res)
+        if serve_cached:
+            _remember_message_docs(ns, [(None, vals, md) for (_, md), vals in zip(matches, _match_values(res))])
+        snippets = [md["text"] for _, md in matches if md.get("text")]
         return "\n---\n".join(snippets) if snippets else None
     except Exception as e:
         logger.debug(f"query_similar_texts failed: {e}")
         return None
 
 
-def query_user_facts(user_id: str, hint_text: str, top_k: int = 5) -> List[str]:
+def query_user_facts(user_id: str, hint_text: str, top_k: int = 5, precomputed_embedding: Optional[List[float]] = None) -> List[str]:
     """Return top semantic user_fact snippets (kind=user_fact) for a user.
 
     hint_text guides the embedding query (can be last user message). We filter by kind=user_fact
@@ -395,10 +669,14 @@ def query_user_facts(user_id: str, hint_text: str, top_k: int = 5) -> List[str]:
     if not _ensure_index_ready():
         return []
     try:
-        emb = create_embedding(hint_text or user_id)
+        emb = precomputed_embedding or get_query_embedding(hint_text or user_id)
         if not emb:
             return []
         ns = f"user:{user_id}"
+        partition = (ns, "user_fact", top_k)
+        cached = _cache_get(partition, emb)
+        if cached is not None:
+            return cached
         kwargs = {
             "vector": emb,
             "top_k": top_k,
@@ -409,20 +687,12 @@ def query_user_facts(user_id: str, hint_text: str, top_k: int = 5) -> List[str]:
             res = index.query(namespace=ns, **kwargs)
         except TypeError:
             res = index.query(**kwargs)
-        matches = (
-            getattr(res, "matches", None)
-            if not isinstance(res, dict)
-            else res.get("matches", [])
-        ) or []
         out: List[str] = []
-        for m in matches:
-            md = getattr(m, "metadata", None)
-            if md is None and isinstance(m, dict):
-                md = m.get("metadata")
-            if isinstance(md, dict):
-                txt = md.get("text")
-                if txt and txt not in out:
-                    out.append(txt)
+        for _, md in _normalize_matches(res):
+            txt = md.get("text")
+            if txt and txt not in out:
+                out.append(txt)
+        _cache_set(partition, emb, out)
         return out
     except Exception as e:  # noqa: BLE001
         logger.debug(f"query_user_facts failed: {e}")
@@ -454,55 +724,56 @@ def upsert_memory_embedding(memory_id: str, user_id: str, text: str, lifecycle_s
             index.upsert(vectors=[(vid, emb, meta)], namespace=ns)
         except TypeError:
             index.upsert(vectors=[(vid, emb, meta)])
+        _query_cache.invalidate(ns, "memory")
     except Exception as e:  # noqa: BLE001
         logger.debug(f"upsert_memory_embedding failed: {e}")
 
 
-def query_user_memories(user_id: str, query_text: str, top_k: int = 8) -> List[Dict[str, Any]]:
+def query_user_memories(user_id: str, query_text: str, top_k: int = 8, precomputed_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
     """Return top memory vectors with similarity score and metadata.
 
-    Only active/candidate/distilled lifecycle memories are considered (filter on metadata lifecycle_state if present).
+    Only active/candidate/distilled lifecycle memories are considered (Pinecone metadata filter on lifecycle_state if present).
     """
     if not _ensure_index_ready() or not query_text:
         return []
     try:
-        emb = create_embedding(query_text)
+        emb = precomputed_embedding or get_query_embedding(query_text)
         if not emb:
             return []
         ns = f"user:{user_id}"
+        partition = (ns, "memory", top_k)
+        cached = _cache_get(partition, emb)
+        if cached is not None:
+            return cached
         kwargs = {
             "vector": emb,
             "top_k": top_k,
             "include_metadata": True,
-            "filter": {"user_id": {"$eq": user_id}, "kind": {"$eq": "memory"}},
+            # Lifecycle filtering happens server-side; memories without a lifecycle_state count as live
+            "filter": {
+                "user_id": {"$eq": user_id},
+                "kind": {"$eq": "memory"},
+                "$or": [
+                    {"lifecycle_state": {"$in": LIVE_LIFECYCLE_STATES}},
+                    {"lifecycle_state": {"$exists": False}},
+                ],
+            },
         }
         try:
             res = index.query(namespace=ns, **kwargs)
         except TypeError:
             res = index.query(**kwargs)
-        matches = (
-            getattr(res, "matches", None)
-            if not isinstance(res, dict)
-            else res.get("matches", [])
-        ) or []
-        out: List[Dict[str, Any]] = []
-        for m in matches:
-            score = getattr(m, "score", None)
-            md = getattr(m, "metadata", None)
-            if score is None and isinstance(m, dict):
-                score = m.get("score")
-                md = m.get("metadata")
-            if isinstance(md, dict):
-                # Filter by lifecycle if needed
-                lc = md.get("lifecycle_state")
-                if lc and lc not in ("active", "candidate", "distilled"):
-                    continue
-                out.append({
-                    "memory_id": md.get("memory_id"),
-                    "similarity": score,
-                    "text": md.get("text"),
-                    "lifecycle_state": lc,
-                })
+        out: List[Dict[str, Any]] = [
+            {
+                "memory_id": md.get("memory_id"),
+                "similarity": score,
+                "text": md.get("text"),
+                "lifecycle_state": md.get("lifecycle_state"),
+            }
+            for score, md in _normalize_matches(res)
+            if md
+        ]
+        _cache_set(partition, emb, out)
         return out
     except Exception as e:  # noqa: BLE001
         logger.debug(f"query_user_memories failed: {e}")
@@ -512,26 +783,40 @@ def query_user_memories(user_id: str, query_text: str, top_k: int = 8) -> List[D
 # =====================================================
 # 🔹 Deletion Helpers (CRUD: Delete)
 # =====================================================
-def delete_vectors(vector_ids: List[str], namespace: Optional[str] = None) -> None:
-    """Delete vectors by IDs, optionally within a namespace."""
+def delete_vectors_bulk(vector_ids: List[str], namespace: Optional[str] = None, batch_size: int = DELETE_BATCH_SIZE) -> None:
+    """Delete vectors by IDs in batch_size chunks issued concurrently on the index thread pool."""
     if not _ensure_index_ready() or not vector_ids:
         return
+    kwargs = {"namespace": namespace} if namespace else {}
+    chunks = list(_chunks(vector_ids, batch_size))
     try:
-        if namespace:
-            index.delete(ids=vector_ids, namespace=namespace)
-        else:
-            index.delete(ids=vector_ids)
-    except TypeError:
-        # Older SDK signatures
-        index.delete(ids=vector_ids)
+        try:
+            pending = [index.delete(ids=chunk, async_req=True, **kwargs) for chunk in chunks]
+        except TypeError:
+            # SDKs without async_req (or namespace) support: sequential chunked deletes
+            pending = []
+            for chunk in chunks:
+                try:
+                    index.delete(ids=chunk, **kwargs)
+                except TypeError:
+                    index.delete(ids=chunk)
+        for r in pending:
+            _await_async_result(r)
     except Exception as e:  # noqa: BLE001
-        logger.debug(f"delete_vectors failed: {e}")
+        logger.debug(f"delete_vectors_bulk failed: {e}")
+    _invalidate_caches(namespace)
+
+
+def delete_vectors(vector_ids: List[str], namespace: Optional[str] = None) -> None:
+    """Delete vectors by IDs, optionally within a namespace."""
+    delete_vectors_bulk(vector_ids, namespace=namespace)
 
 
 def delete_user_memory_vectors(user_id: str, memory_id: str) -> None:
     """Delete vectors associated with a structured memory item."""
     try:
-        delete_vectors([f"memory:{memory_id}"])
+        # Memory vectors are upserted into the user's namespace
+        delete_vectors([f"memory:{memory_id}"], namespace=f"user:{user_id}")
     except Exception:  # noqa: BLE001
         pass
 
@@ -541,6 +826,7 @@ def delete_user_namespace(user_id: str) -> None:
     if not _ensure_index_ready():
         return
     ns = f"user:{user_id}"
+    _invalidate_caches(ns)
     try:
         index.delete(delete_all=True, namespace=ns)
     except TypeError:
@@ -0,0 +1,270 @@
+"""
+In-process semantic cache for Pinecone query results.
+
+Entries are keyed by an L2-normalized query embedding. A lookup is a single
+matrix-vector product against the stored embeddings of one partition; the
+best match is returned when its cosine similarity reaches the threshold.
+Partitions are tuples whose first two items are (namespace, kind), so
+writes to a namespace can invalidate exactly the results they affect.
+
+The same structure also serves as a document cache: entries keyed by the
+documents' own embeddings and looked up with search() at a lower query-to-
+document threshold, with near-duplicate documents updated in place.
+
+When faiss is installed, partitions with at least FAISS_MIN_ENTRIES entries
+are mirrored into a faiss.IndexFlatIP (inner product on normalized vectors =
+cosine) for SIMD top-k lookups; smaller partitions use a NumPy matmul. The
+NumPy matrix stays the source of truth: removals are applied to the index in
+place (IndexFlat keeps row order), and only in-place updates force a rebuild.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - numpy optional; cache is disabled without it
+    np = None
+try:
+    import faiss  # type: ignore
+except Exception:  # pragma: no cover - faiss optional; NumPy matmul lookups are used without it
+    faiss = None
+
+logger = logging.getLogger(__name__)
+
+# Partition size from which faiss lookups beat a NumPy matmul (and rebuilds pay off)
+FAISS_MIN_ENTRIES = 1024
+
+
+class _Partition:
+    __slots__ = ("entry_ids", "vectors", "results", "index", "index_stale")
+
+    def __init__(self, dim: int):
+        self.entry_ids: List[int] = []
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.results: List[Tuple[Any, float]] = []  # (result, stored_at)
+        self.index = None  # faiss mirror, built once the partition reaches FAISS_MIN_ENTRIES
+        self.index_stale = False
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    def add(self, entry_id: int, vec: "np.ndarray", result: Any) -> None:
+        self.entry_ids.append(entry_id)
+        self.results.append((result, time.time()))
+        self.vectors = np.vstack([self.vectors, vec[None, :]])
+        if self.index is not None and not self.index_stale:
+            self.index.add(vec[None, :])
+
+    def replace(self, row: int, vec: "np.ndarray", result: Any) -> None:
+        self.results[row] = (result, time.time())
+        self.vectors[row] = vec
+        self.index_stale = True
+
+    def remove(self, row: int) -> None:
+        del self.entry_ids[row]
+        del self.results[row]
+        self.vectors = np.delete(self.vectors, row, axis=0)
+        if self.index is not None and not self.index_stale:
+            self.index.remove_ids(np.array([row], dtype=np.int64))
+
+    def _sync_index(self) -> None:
+        """Build the faiss mirror once the partition is large enough; drop it well below that.
+
+        The gap between the two sizes keeps a partition hovering at the threshold
+        (full cache: one eviction per insert) from rebuilding on every lookup.
+        """
+        if faiss is None:
+            return
+        n = len(self.entry_ids)
+        if self.index is None:
+            if n < FAISS_MIN_ENTRIES:
+                return
+        elif n < FAISS_MIN_ENTRIES // 2:
+            self.index = None
+            self.index_stale = False
+            return
+        elif not self.index_stale:
+            return
+        self.index = faiss.IndexFlatIP(self.dim)
+        self.index.add(self.vectors)
+        self.index_stale = False
+
+    def top(self, query: "np.ndarray", k: int) -> List[Tuple[int, float]]:
+        """(row, cosine) pairs of the k most similar entries, best first."""
+        n = len(self.entry_ids)
+        k = min(k, n)
+        if k <= 0:
+            return []
+        self._sync_index()
+        if self.index is not None:
+            D, I = self.index.search(query[None, :], k)
+            return [(int(i), float(d)) for d, i in zip(D[0], I[0]) if i >= 0]
+        sims = self.vectors @ query
+        if k == 1:
+            row = int(np.argmax(sims))
+            return [(row, float(sims[row]))]
+        rows = np.argpartition(-sims, k - 1)[:k]
+        rows = rows[np.argsort(-sims[rows])]
+        return [(int(r), float(sims[r])) for r in rows]
+
+
+class SemanticCache:
+    """LRU + TTL cache of query results looked up by embedding similarity."""
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_size: int = 2048,
+        ttl_seconds: int = 7 * 24 * 3600,
+        dedup_threshold: Optional[float] = None,
+    ):
+        self.threshold = threshold
+        # When set, set() replaces an entry more similar than this instead of adding a new one
+        self.dedup_threshold = dedup_threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._partitions: Dict[Hashable, _Partition] = {}
+        self._lru: "OrderedDict[int, Hashable]" = OrderedDict()  # entry_id -> partition key
+        self._next_id = 0
+
+    @property
+    def enabled(self) -> bool:
+        return np is not None
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    @staticmethod
+    def _normalize(embedding) -> Optional["np.ndarray"]:
+        vec = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vec))
+        if not norm:
+            return None
+        return vec / norm
+
+    def get(self, partition: Hashable, embedding) -> Optional[Any]:
+        """Return the cached result for the nearest stored query, or None on miss."""
+        if not self.enabled or embedding is None:
+            return None
+        query = self._normalize(embedding)
+        if query is None:
+            return None
+        with self._lock:
+            part = self._partitions.get(partition)
+            if part is None or not part.entry_ids or part.dim != query.shape[0]:
+                return None
+            best = part.top(query, 1)
+            if not best or best[0][1] < self.threshold:
+                return None
+            row = best[0][0]
+            result, stored_at = part.results[row]
+            entry_id = part.entry_ids[row]
+            if time.time() - stored_at > self.ttl_seconds:
+                self._remove_entry(partition, part, row)
+                return None
+            self._lru.move_to_end(entry_id)
+            return result
+
+    def search(self, partition: Hashable, embedding, k: int) -> List[Any]:
+        """Return up to k live results with similarity >= threshold, most similar first."""
+        if not self.enabled or embedding is None or k <= 0:
+            return []
+        query = self._normalize(embedding)
+        if query is None:
+            return []
+        with self._lock:
+            part = self._partitions.get(partition)
+            if part is None or not part.entry_ids or part.dim != query.shape[0]:
+                return []
+            now = time.time()
+            out: List[Any] = []
+            for row, sim in part.top(query, k):
+                if sim < self.threshold:
+                    break
+                result, stored_at = part.results[row]
+                if now - stored_at > self.ttl_seconds:
+                    continue
+                self._lru.move_to_end(part.entry_ids[row])
+                out.append(result)
+            return out
+
+    def set(self, partition: Hashable, embedding, result: Any) -> None:
+        """Store a result under an embedding, evicting least-recently-used entries.
+
+        With dedup_threshold set, a near-duplicate entry is updated in place instead.
+        """
+        if not self.enabled or embedding is None:
+            return
+        vec = self._normalize(embedding)
+        if vec is None:
+            return
+        with self._lock:
+            part = self._partitions.get(partition)
+            if part is None or part.dim != vec.shape[0]:
+                if part is not None:
+                    # Embedding dimension changed: the old entries can never match again
+                    self._drop_partition(partition)
+                part = _Partition(vec.shape[0])
+                self._partitions[partition] = part
+            if self.dedup_threshold is not None and part.entry_ids:
+                row, sim = part.top(vec, 1)[0]
+                if sim > self.dedup_threshold:
+                    part.replace(row, vec, result)
+                    self._lru.move_to_end(part.entry_ids[row])
+                    logger.debug(f"Semantic cache updated near-duplicate (sim={sim:.3f}) in {partition}")
+                    return
+            entry_id = self._next_id
+            self._next_id += 1
+            part.add(entry_id, vec, result)
+            self._lru[entry_id] = partition
+            while len(self._lru) > self.max_size:
+                self._evict_oldest()
+
+    def _remove_entry(self, partition: Hashable, part: _Partition, row: int) -> None:
+        """Remove one entry from a partition and the LRU, dropping the partition once empty."""
+        self._lru.pop(part.entry_ids[row], None)
+        part.remove(row)
+        if not part.entry_ids:
+            self._partitions.pop(partition, None)
+
+    def _drop_partition(self, partition: Hashable) -> None:
+        part = self._partitions.pop(partition, None)
+        if part is not None:
+            for entry_id in part.entry_ids:
+                self._lru.pop(entry_id, None)
+
+    def _evict_oldest(self) -> None:
+        entry_id, partition = self._lru.popitem(last=False)
+        part = self._partitions.get(partition)
+        if part is None:
+            return
+        try:
+            row = part.entry_ids.index(entry_id)
+        except ValueError:
+            return
+        self._remove_entry(partition, part, row)
+
+    def invalidate(self, namespace: Optional[str], kind: Optional[str] = None) -> None:
+        """Drop partitions for a namespace (optionally only one kind) after writes/deletes."""
+        with self._lock:
+            for key in list(self._partitions):
+                if not isinstance(key, tuple) or len(key) < 2 or key[0] != namespace:
+                    continue
+                if kind is not None and key[1] != kind:
+                    continue
+                self._drop_partition(key)
+        logger.debug(f"Semantic cache invalidated ns={namespace} kind={kind}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._partitions.clear()
+            self._lru.clear()
+
+
+__all__ = ["SemanticCache"]
@@ -0,0 +1,171 @@
+from app.services import embedding_service, pinecone_service
+
+
+class FakeAsyncResult:
+    def get(self):
+        return {"upserted_count": 0}
+
+
+class FakeIndex:
+    def __init__(self):
+        self.calls = []
+
+    def upsert(self, vectors, namespace=None, async_req=False, **kwargs):
+        self.calls.append({"vectors": list(vectors), "namespace": namespace, "async_req": async_req})
+        return FakeAsyncResult() if async_req else None
+
+
+def _vec(seed: float) -> list[float]:
+    return [seed] * 768
+
+
+def test_bulk_upsert_embeds_in_one_batch(monkeypatch):
+    batch_calls = []
+
+    def fake_batch(texts):
+        batch_calls.append(list(texts))
+        return [_vec(i + 1) for i in range(len(texts))]
+
+    def fail_single(text):
+        raise AssertionError("bulk_upsert should not embed per item")
+
+    fake_index = FakeIndex()
+    monkeypatch.setattr(pinecone_service, "index", fake_index)
+    monkeypatch.setattr(pinecone_service, "create_embedding_batch", fake_batch)
+    monkeypatch.setattr(pinecone_service, "create_embedding", fail_single)
+
+    payloads = [
+        {"user_id": "u1", "session_id": "s1", "text": "hello", "timestamp": "t1", "kind": "message", "role": "user"},
+        {"user_id": "u1", "text": "", "timestamp": "t2", "kind": "message"},
+        {"user_id": "u1", "text": "likes tea", "timestamp": "t3", "kind": "user_fact"},
+    ]
+    pinecone_service.bulk_upsert(payloads)
+
+    assert batch_calls == [["hello", "likes tea"]]
+    sent = [v for call in fake_index.calls for v in call["vectors"]]
+    assert [v[2]["text"] for v in sent] == ["hello", "likes tea"]
+    assert sent[0][1] == _vec(1) and sent[1][1] == _vec(2)
+    assert all(call["namespace"] == "user:u1" for call in fake_index.calls)
+
+
+def test_create_embedding_batch_retries_failed_sub_batch_individually(monkeypatch):
+    def flaky_batch(texts):
+        if "bad" in texts:
+            raise RuntimeError("sub-batch rejected")
+        return [_vec(1.0) for _ in texts]
+
+    embedding_service.FAILED_PROVIDERS.clear()
+    monkeypatch.setattr(embedding_service, "BATCH_EMBEDDING_PROVIDERS", [("fake_batch", flaky_batch)])
+    monkeypatch.setattr(embedding_service, "EMBEDDING_PROVIDERS", [("fake", lambda text: _vec(2.0))])
+
+    out = embedding_service.create_embedding_batch(["a", "b", "bad", "c"], batch_size=2)
+    embedding_service.FAILED_PROVIDERS.clear()
+
+    assert len(out) == 4
+    assert out[0] == _vec(1.0) and out[1] == _vec(1.0)
+    assert out[2] == _vec(2.0) and out[3] == _vec(2.0)
+
+
+def test_bulk_upsert_sends_parallel_chunks(monkeypatch):
+    fake_index = FakeIndex()
+    monkeypatch.setattr(pinecone_service, "index", fake_index)
+    monkeypatch.setattr(pinecone_service, "create_embedding_batch", lambda texts: [_vec(0.5) for _ in texts])
+
+    payloads = [
+        {"user_id": "u2", "session_id": "s", "text": f"msg {i}", "timestamp": str(i), "kind": "message"}
+        for i in range(250)
+    ]
+    pinecone_service.bulk_upsert(payloads)
+
+    assert [len(call["vectors"]) for call in fake_index.calls] == [100, 100, 50]
+    assert all(call["async_req"] for call in fake_index.calls)
+
+
+def test_bulk_upsert_routes_each_user_to_own_namespace(monkeypatch):
+    fake_index = FakeIndex()
+    monkeypatch.setattr(pinecone_service, "index", fake_index)
+    monkeypatch.setattr(pinecone_service, "create_embedding_batch", lambda texts: [_vec(0.5) for _ in texts])
+
+    payloads = [
+        {"user_id": "a", "text": "fact a", "timestamp": "1", "kind": "user_fact"},
+        {"user_id": "b", "session_id": "s", "text": "msg b", "timestamp": "2", "kind": "message", "role": "user"},
+    ]
+    pinecone_service.bulk_upsert(payloads)
+
+    by_ns = {call["namespace"]: call["vectors"] for call in fake_index.calls}
+    assert set(by_ns) == {"user:a", "user:b"}
+    assert by_ns["user:a"][0][0] == pinecone_service._fact_vector_id("a", "fact a")
+    assert by_ns["user:b"][0][0] == "b:s:2:user"
+
+
+def test_bulk_upsert_pipeline_embeds_in_chunks(monkeypatch):
+    batch_sizes = []
+
+    def fake_batch(texts):
+        batch_sizes.append(len(texts))
+        return [_vec(0.5) for _ in texts]
+
+    fake_index = FakeIndex()
+    monkeypatch.setattr(pinecone_service, "index", fake_index)
+    monkeypatch.setattr(pinecone_service, "create_embedding_batch", fake_batch)
+
+    total = pinecone_service.PIPELINE_EMBED_CHUNK * 2 + 10
+    payloads = [
+        {"user_id": "u3", "session_id": "s", "text": f"msg {i}", "timestamp": str(i), "kind": "message"}
+        for i in range(total)
+    ]
+    pinecone_service.bulk_upsert(payloads)
+
+    assert batch_sizes == [pinecone_service.PIPELINE_EMBED_CHUNK] * 2 + [10]
+    assert sum(len(call["vectors"]) for call in fake_index.calls) == total
+
+
+def test_bulk_upsert_builds_grpc_vectors_when_bound_via_grpc(monkeypatch):
+    class FakeVector:
+        def __init__(self, id, values, metadata):
+            self.id, self.values, self.metadata = id, values, metadata
+
+    fake_index = FakeIndex()
+    monkeypatch.setattr(pinecone_service, "index", fake_index)
+    monkeypatch.setattr(pinecone_service, "_GRPC_VECTOR", (FakeVector, lambda meta: ("struct", dict(meta))))
+    monkeypatch.setattr(pinecone_service, "create_embedding_batch", lambda texts: [_vec(0.25) for _ in texts])
+
+    pinecone_service.bulk_upsert([{"user_id": "u5", "session_id": "s", "text": "hi", "timestamp": "1", "kind": "message"}])
+
+    (sent,) = fake_index.calls[0]["vectors"]
+    assert isinstance(sent, FakeVector)
+    assert sent.id == "u5:s:1:user"
+    assert sent.values == _vec(0.25)
+    assert sent.metadata[0] == "struct" and sent.metadata[1]["text"] == "hi"
+
+
+def test_grpc_future_rate_limit_is_retried_with_backoff(monkeypatch):
+    import enum
+
+    class StatusCode(enum.Enum):
+        RESOURCE_EXHAUSTED = 8
+
+    class FakeRpcError(Exception):
+        def code(self):
+            return StatusCode.RESOURCE_EXHAUSTED
+
+    class FakeGrpcFuture:
+        def result(self):
+            # PineconeGrpcFuture wraps the RpcError; its debug string need not name the status
+            try:
+                raise FakeRpcError()
+            except FakeRpcError as rpc_err:
+                raise RuntimeError('{"created":"@1700000000","grpc_status":8}') from rpc_err
+
+    class RateLimitedIndex(FakeIndex):
+        def upsert(self, vectors, namespace=None, async_req=False, **kwargs):
+            self.calls.append({"vectors": list(vectors), "namespace": namespace, "async_req": async_req})
+            return FakeGrpcFuture() if async_req else None
+
+    fake_index = RateLimitedIndex()
+    monkeypatch.setattr(pinecone_service, "index", fake_index)
+    monkeypatch.setattr(pinecone_service.pinecone_ratelimit.time, "sleep", lambda seconds: None)
+
+    pinecone_service._upsert_vectors([("v1", _vec(0.5), {"text": "hi"})], namespace="user:u6")
+
+    assert [call["async_req"] for call in fake_index.calls] == [True, False]
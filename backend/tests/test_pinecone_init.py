@@ -0,0 +1,129 @@
+import sys
+import types
+
+from app.services import pinecone_service
+
+
+class FakeIndexList(list):
+    def names(self):
+        return list(self)
+
+
+class FakePinecone:
+    instances = []
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+        self.control_calls = []
+        self.index_calls = []
+        FakePinecone.instances.append(self)
+
+    def list_indexes(self):
+        self.control_calls.append("list_indexes")
+        return FakeIndexList([pinecone_service.PINECONE_INDEX_NAME])
+
+    def describe_index(self, name):
+        self.control_calls.append("describe_index")
+        return types.SimpleNamespace(dimension=pinecone_service.REQUIRED_DIMENSION, host="described-host")
+
+    def Index(self, **kwargs):
+        self.index_calls.append(kwargs)
+        return types.SimpleNamespace(bound_with=kwargs)
+
+
+def _install_fake_pinecone(monkeypatch, grpc=True):
+    FakePinecone.instances = []
+    pinecone_mod = types.ModuleType("pinecone")
+    pinecone_mod.Pinecone = FakePinecone
+    pinecone_mod.ServerlessSpec = lambda **kwargs: kwargs
+    monkeypatch.setitem(sys.modules, "pinecone", pinecone_mod)
+    # None in sys.modules makes `from pinecone.grpc import ...` raise ImportError
+    monkeypatch.setitem(sys.modules, "pinecone.grpc", None)
+    monkeypatch.setitem(sys.modules, "pinecone.grpc.utils", None)
+    monkeypatch.setattr(pinecone_service.settings, "PINECONE_API_KEY", "test-key")
+    monkeypatch.setattr(pinecone_service.settings, "PINECONE_USE_GRPC", grpc)
+    monkeypatch.setattr(pinecone_service.settings, "PINECONE_INDEX_HOST", None)
+    monkeypatch.setattr(pinecone_service, "pc", None)
+    monkeypatch.setattr(pinecone_service, "index", None)
+    monkeypatch.setattr(pinecone_service, "_INDEX_HOST", None)
+    monkeypatch.setattr(pinecone_service, "_GRPC_VECTOR", None)
+    return pinecone_mod
+
+
+def test_initialize_pinecone_reuses_bound_index(monkeypatch):
+    _install_fake_pinecone(monkeypatch, grpc=False)
+
+    pinecone_service.initialize_pinecone()
+    bound = pinecone_service.index
+    pinecone_service.initialize_pinecone()
+
+    assert bound is not None and pinecone_service.index is bound
+    assert len(FakePinecone.instances) == 1
+    assert FakePinecone.instances[0].index_calls == [
+        {"pool_threads": pinecone_service.INDEX_POOL_THREADS, "host": "described-host"}
+    ]
+
+
+def test_initialize_pinecone_binds_configured_host_without_control_plane(monkeypatch):
+    _install_fake_pinecone(monkeypatch, grpc=False)
+    monkeypatch.setattr(pinecone_service.settings, "PINECONE_INDEX_HOST", "configured-host")
+
+    pinecone_service.initialize_pinecone()
+
+    (client,) = FakePinecone.instances
+    assert client.control_calls == []
+    assert client.index_calls[0]["host"] == "configured-host"
+
+
+def test_initialize_pinecone_rebinds_by_cached_host(monkeypatch):
+    _install_fake_pinecone(monkeypatch, grpc=False)
+
+    pinecone_service.initialize_pinecone()
+    assert pinecone_service._INDEX_HOST == "described-host"
+    first = FakePinecone.instances[0]
+    assert first.control_calls == ["list_indexes", "describe_index"]
+
+    # After a reset (e.g. failed init), re-binding skips list/describe via the cached host
+    monkeypatch.setattr(pinecone_service, "index", None)
+    pinecone_service.initialize_pinecone()
+
+    second = FakePinecone.instances[1]
+    assert second.control_calls == []
+    assert second.index_calls[0]["host"] == "described-host"
+
+
+class FakePineconeGRPC(FakePinecone):
+    def Index(self, **kwargs):
+        if "pool_threads" in kwargs:
+            raise TypeError("Index() got an unexpected keyword argument 'pool_threads'")
+        return super().Index(**kwargs)
+
+
+def test_initialize_pinecone_prefers_grpc_client(monkeypatch):
+    _install_fake_pinecone(monkeypatch, grpc=True)
+    grpc_mod = types.ModuleType("pinecone.grpc")
+    grpc_mod.PineconeGRPC = FakePineconeGRPC
+    grpc_mod.Vector = object
+    utils_mod = types.ModuleType("pinecone.grpc.utils")
+    utils_mod.dict_to_proto_struct = dict
+    monkeypatch.setitem(sys.modules, "pinecone.grpc", grpc_mod)
+    monkeypatch.setitem(sys.modules, "pinecone.grpc.utils", utils_mod)
+
+    pinecone_service.initialize_pinecone()
+
+    (client,) = FakePinecone.instances
+    assert isinstance(client, FakePineconeGRPC)
+    # pool_threads rejected by the gRPC Index: retried without it
+    assert client.index_calls == [{"host": "described-host"}]
+    assert pinecone_service._GRPC_VECTOR == (object, dict)
+
+
+def test_initialize_pinecone_falls_back_to_rest_without_grpc_extra(monkeypatch):
+    _install_fake_pinecone(monkeypatch, grpc=True)  # pinecone.grpc is not importable
+
+    pinecone_service.initialize_pinecone()
+
+    (client,) = FakePinecone.instances
+    assert type(client) is FakePinecone
+    assert client.index_calls[0]["pool_threads"] == pinecone_service.INDEX_POOL_THREADS
+    assert pinecone_service._GRPC_VECTOR is None
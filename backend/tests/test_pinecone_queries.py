@@ -0,0 +1,273 @@
+import types
+
+import pytest
+
+from app.services import embedding_service, pinecone_service
+
+
+def _match(score, metadata):
+    return types.SimpleNamespace(score=score, metadata=metadata)
+
+
+class FakeQueryIndex:
+    def __init__(self, response):
+        self.response = response
+        self.queries = []
+        self.upserts = []
+
+    def query(self, **kwargs):
+        self.queries.append(kwargs)
+        return self.response
+
+    def upsert(self, vectors, namespace=None, **kwargs):
+        self.upserts.append((namespace, list(vectors)))
+
+
+def test_normalize_matches_handles_objects_and_dicts():
+    obj_res = types.SimpleNamespace(matches=[_match(0.9, {"text": "a"}), _match(0.5, None)])
+    dict_res = {"matches": [{"score": 0.8, "metadata": {"text": "b"}}]}
+
+    assert pinecone_service._normalize_matches(obj_res) == [(0.9, {"text": "a"}), (0.5, {})]
+    assert pinecone_service._normalize_matches(dict_res) == [(0.8, {"text": "b"})]
+    assert pinecone_service._normalize_matches(None) == []
+    assert pinecone_service._normalize_matches({"matches": None}) == []
+
+
+def test_query_user_memories_uses_cache_until_memory_upsert(monkeypatch):
+    pytest.importorskip("numpy")
+    response = types.SimpleNamespace(matches=[
+        _match(0.91, {"memory_id": "m1", "text": "likes pizza", "lifecycle_state": "active"}),
+    ])
+    fake_index = FakeQueryIndex(response)
+    monkeypatch.setattr(pinecone_service, "index", fake_index)
+    monkeypatch.setattr(pinecone_service, "get_query_embedding", lambda text: [1.0, 0.0, 0.0])
+    monkeypatch.setattr(pinecone_service, "create_embedding", lambda text: [0.0, 1.0, 0.0])
+    pinecone_service._query_cache.clear()
+
+    first = pinecone_service.query_user_memories("u1", "pizza?")
+    second = pinecone_service.query_user_memories("u1", "pizza??")
+    assert first == second == [
+        {"memory_id": "m1", "similarity": 0.91, "text": "likes pizza", "lifecycle_state": "active"}
+    ]
+    assert len(fake_index.queries) == 1
+    assert fake_index.queries[0]["filter"]["kind"] == {"$eq": "memory"}
+
+    # Callers may mutate results without corrupting the cache
+    second.append({"memory_id": "extra"})
+    assert len(pinecone_service.query_user_memories("u1", "pizza")) == 1
+
+    pinecone_service.upsert_memory_embedding("m2", "u1", "likes pasta", "active")
+    pinecone_service.query_user_memories("u1", "pizza?")
+    assert len(fake_index.queries) == 2
+    pinecone_service._query_cache.clear()
+
+
+def test_query_user_memories_filters_lifecycle_server_side(monkeypatch):
+    # Whatever the server returns is trusted: no second lifecycle pass on the client
+    response = types.SimpleNamespace(matches=[
+        _match(0.9, {"memory_id": "m1", "text": "a", "lifecycle_state": "archived"}),
+        _match(0.8, {"memory_id": "m2", "text": "b"}),
+    ])
+    fake_index = FakeQueryIndex(response)
+    monkeypatch.setattr(pinecone_service, "index", fake_index)
+    monkeypatch.setattr(pinecone_service.settings, "PINECONE_QUERY_CACHE_ENABLE", False)
+
+    out = pinecone_service.query_user_memories("u1", "anything", precomputed_embedding=[1.0, 0.0])
+
+    assert fake_index.queries[0]["filter"]["$or"] == [
+        {"lifecycle_state": {"$in": ["active", "candidate", "distilled"]}},
+        {"lifecycle_state": {"$exists": False}},
+    ]
+    assert [m["memory_id"] for m in out] == ["m1", "m2"]
+
+
+def test_query_similar_texts_always_asks_pinecone_by_default(monkeypatch):
+    response = types.SimpleNamespace(matches=[_match(0.8, {"kind": "message", "text": "older history"})])
+    fake_index = FakeQueryIndex(response)
+    monkeypatch.setattr(pinecone_service, "index", fake_index)
+    monkeypatch.setattr(pinecone_service.settings, "PINECONE_MESSAGE_CACHE_SERVE", False)
+    monkeypatch.setattr(pinecone_service, "create_embedding", lambda text: [1.0, 0.1, 0.0])
+    pinecone_service._message_doc_cache.clear()
+
+    pinecone_service.upsert_message_embedding("u1", "s1", "I love hiking", "user", "t1")
+    out = pinecone_service.query_similar_texts("u1", "hiking?", top_k=1, precomputed_embedding=[1.0, 0.0, 0.0])
+
+    assert out == "older history"
+    assert len(fake_index.queries) == 1
+    assert "include_values" not in fake_index.queries[0]
+    assert len(pinecone_service._message_doc_cache) == 0
+
+
+def test_query_similar_texts_served_from_message_document_cache(monkeypatch):
+    pytest.importorskip("numpy")
+    response = types.SimpleNamespace(matches=[
+        types.SimpleNamespace(score=0.8, metadata={"kind": "message", "text": "remote doc"}, values=[0.0, 1.0, 0.0]),
+    ])
+    fake_index = FakeQueryIndex(response)
+    monkeypatch.setattr(pinecone_service, "index", fake_index)
+    monkeypatch.setattr(pinecone_service.settings, "PINECONE_MESSAGE_CACHE_SERVE", True)
+    monkeypatch.setattr(pinecone_service, "create_embedding", lambda text: [1.0, 0.1, 0.0])
+    pinecone_service._message_doc_cache.clear()
+
+    pinecone_service.upsert_message_embedding("u1", "s1", "I love hiking", "user", "t1")
+
+    # Query close to the upserted message document: no Pinecone round-trip
+    out = pinecone_service.query_similar_texts("u1", "hiking?", top_k=1, precomputed_embedding=[1.0, 0.0, 0.0])
+    assert out == "I love hiking"
+    assert fake_index.queries == []
+
+    # Unrelated query falls through to Pinecone, whose matches are remembered by their own vectors
+    out = pinecone_service.query_similar_texts("u1", "other", top_k=1, precomputed_embedding=[0.0, 0.0, 1.0])
+    assert out == "remote doc"
+    assert fake_index.queries[0]["include_values"] is True
+    assert pinecone_service._message_doc_cache.search(("user:u1", "message"), [0.0, 1.0, 0.0], 1) == ["remote doc"]
+    pinecone_service._message_doc_cache.clear()
+
+
+def test_delete_vectors_bulk_sends_concurrent_chunks(monkeypatch):
+    class FakeDeleteIndex:
+        def __init__(self):
+            self.deletes = []
+
+        def delete(self, ids, namespace=None, async_req=False, **kwargs):
+            self.deletes.append((list(ids), namespace, async_req))
+            return types.SimpleNamespace(get=lambda: {})
+
+    fake_index = FakeDeleteIndex()
+    monkeypatch.setattr(pinecone_service, "index", fake_index)
+
+    ids = [f"v{i}" for i in range(2500)]
+    pinecone_service.delete_vectors(ids, namespace="user:u1")
+    assert [len(c) for c, _, _ in fake_index.deletes] == [1000, 1000, 500]
+    assert all(ns == "user:u1" and async_req for _, ns, async_req in fake_index.deletes)
+
+    fake_index.deletes.clear()
+    pinecone_service.delete_user_memory_vectors("u1", "m1")
+    assert fake_index.deletes == [(["memory:m1"], "user:u1", True)]
+
+
+def test_get_query_embedding_memoizes_successes_only(monkeypatch):
+    calls = []
+
+    def flaky_embedding(text):
+        calls.append(text)
+        return None if len(calls) == 1 else [0.5, 0.5, 0.0]
+
+    monkeypatch.setattr(embedding_service, "create_embedding", flaky_embedding)
+    embedding_service._cached_query_embedding.cache_clear()
+
+    assert embedding_service.get_query_embedding("") is None
+    assert calls == []
+
+    # A failed embedding is not cached: the next call asks the provider again
+    assert embedding_service.get_query_embedding("pizza?") is None
+    first = embedding_service.get_query_embedding("pizza?")
+    assert first == [0.5, 0.5, 0.0]
+    first.append(1.0)  # callers get their own list
+    assert embedding_service.get_query_embedding("pizza?") == [0.5, 0.5, 0.0]
+    assert calls == ["pizza?", "pizza?"]
+    embedding_service._cached_query_embedding.cache_clear()
+
+
+def _stub_memory_layers(monkeypatch, memory_coordinator):
+    async def fake_session_state(session_id, default=None):
+        return default
+
+    async def fake_session_history(session_id, limit=50):
+        return []
+
+    async def fake_cached_profile(user_id):
+        return {"name": "Sam"}
+
+    async def fake_graph_facts(user_id):
+        return "likes tea"
+
+    async def fake_list_memories(user_id, limit=300, lifecycle=None):
+        return []
+
+    monkeypatch.setattr(memory_coordinator.memory_store, "get_session_state", fake_session_state)
+    monkeypatch.setattr(memory_coordinator.memory_store, "get_session_history", fake_session_history)
+    monkeypatch.setattr(memory_coordinator.memory_store, "get_cached_user_profile", fake_cached_profile)
+    monkeypatch.setattr(memory_coordinator.neo4j_service, "get_user_facts", fake_graph_facts)
+    monkeypatch.setattr(memory_coordinator.memory_service, "list_memories", fake_list_memories)
+    monkeypatch.setattr(memory_coordinator.redis_async_service, "redis_client", None, raising=False)
+    monkeypatch.setattr(memory_coordinator, "_memory_manager", None)
+
+
+@pytest.mark.asyncio
+async def test_gather_memory_context_shares_one_query_embedding(monkeypatch):
+    from app.services import memory_coordinator
+
+    query_emb = [0.1, 0.2, 0.3]
+    embedded = []
+    lookups = []
+
+    def fake_query_embedding(text):
+        embedded.append(text)
+        return query_emb
+
+    def fake_similar_texts(user_id, text, top_k=3, precomputed_embedding=None):
+        lookups.append(("similar_texts", precomputed_embedding))
+        return "earlier message"
+
+    def fake_user_facts(user_id, hint_text, top_k=5, precomputed_embedding=None):
+        lookups.append(("user_facts", precomputed_embedding))
+        return ["likes tea"]
+
+    def fake_user_memories(user_id, query_text, top_k=8, precomputed_embedding=None):
+        lookups.append(("user_memories", precomputed_embedding))
+        return []
+
+    monkeypatch.setattr(memory_coordinator, "get_query_embedding", fake_query_embedding)
+    monkeypatch.setattr(pinecone_service, "index", object())
+    monkeypatch.setattr(pinecone_service, "query_similar_texts", fake_similar_texts)
+    monkeypatch.setattr(pinecone_service, "query_user_facts", fake_user_facts)
+    monkeypatch.setattr(pinecone_service, "query_user_memories", fake_user_memories)
+    _stub_memory_layers(monkeypatch, memory_coordinator)
+
+    ctx = await memory_coordinator.gather_memory_context(
+        user_id="u1", user_key="u1", session_id="s1", latest_user_message="what do I drink?"
+    )
+
+    assert embedded == ["what do I drink?"]
+    assert lookups[:3] == [
+        ("similar_texts", query_emb),
+        ("user_facts", query_emb),
+        ("user_memories", query_emb),
+    ]
+    assert ctx["pinecone_context"] == "earlier message"
+    assert ctx["user_facts_semantic"] == ["likes tea"]
+
+
+def test_invalidate_user_cache_drops_only_that_users_results():
+    pytest.importorskip("numpy")
+    pinecone_service._query_cache.clear()
+    pinecone_service._query_cache.set(("user:u1", "memory", 5), [1.0, 0.0], ["m1"])
+    pinecone_service._query_cache.set(("user:u1", "user_fact", 5), [1.0, 0.0], ["f1"])
+    pinecone_service._query_cache.set(("user:u2", "memory", 5), [1.0, 0.0], ["m2"])
+
+    pinecone_service.invalidate_user_cache("u1")
+
+    assert pinecone_service._query_cache.get(("user:u1", "memory", 5), [1.0, 0.0]) is None
+    assert pinecone_service._query_cache.get(("user:u1", "user_fact", 5), [1.0, 0.0]) is None
+    assert pinecone_service._query_cache.get(("user:u2", "memory", 5), [1.0, 0.0]) == ["m2"]
+    pinecone_service._query_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_gather_memory_context_skips_query_embedding_without_pinecone(monkeypatch):
+    from app.services import memory_coordinator
+
+    embedded = []
+    monkeypatch.setattr(memory_coordinator, "get_query_embedding", lambda text: embedded.append(text))
+    monkeypatch.setattr(pinecone_service, "index", None)
+    monkeypatch.setattr(pinecone_service, "_ensure_index_ready", lambda: False)
+    _stub_memory_layers(monkeypatch, memory_coordinator)
+
+    ctx = await memory_coordinator.gather_memory_context(
+        user_id="u1", user_key="u1", session_id="s1", latest_user_message="what do I drink?"
+    )
+
+    assert embedded == []
+    assert ctx["pinecone_context"] is None
+    assert ctx["user_facts_semantic"] == []
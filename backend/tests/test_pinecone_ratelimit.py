@@ -0,0 +1,56 @@
+import pytest
+
+from app.services import pinecone_ratelimit
+from app.services.pinecone_ratelimit import TokenBucket, call_with_backoff
+
+
+def test_token_bucket_waits_for_refill(monkeypatch):
+    clock = {"now": 0.0}
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock["now"] += seconds
+
+    monkeypatch.setattr(pinecone_ratelimit.time, "monotonic", lambda: clock["now"])
+    monkeypatch.setattr(pinecone_ratelimit.time, "sleep", fake_sleep)
+
+    bucket = TokenBucket(capacity=100, refill_per_sec=100)
+    with bucket.reserve(80):
+        pass
+    assert sleeps == []
+    with bucket.reserve(50):  # 20 left -> needs 30 more bytes = 0.3s
+        pass
+    assert sleeps == [pytest.approx(0.3)]
+
+
+def test_call_with_backoff_retries_only_rate_limit_errors(monkeypatch):
+    monkeypatch.setattr(pinecone_ratelimit.time, "sleep", lambda seconds: None)
+    attempts = {"n": 0}
+
+    def flaky():
+        attempts["n"] += 1
+        if attempts["n"] < 3:
+            raise RuntimeError("StatusCode.RESOURCE_EXHAUSTED")
+        return "ok"
+
+    assert call_with_backoff(flaky) == "ok"
+    assert attempts["n"] == 3
+
+    def broken():
+        raise ValueError("bad vector")
+
+    with pytest.raises(ValueError):
+        call_with_backoff(broken)
+
+
+def test_is_resource_exhausted_ignores_incidental_429():
+    class ApiException(Exception):
+        def __init__(self, status, reason):
+            super().__init__(f"({status})\nReason: {reason}")
+            self.status = status
+
+    assert pinecone_ratelimit.is_resource_exhausted(ApiException(429, "Too Many Requests"))
+    assert pinecone_ratelimit.is_resource_exhausted(RuntimeError("status = StatusCode.RESOURCE_EXHAUSTED"))
+    assert not pinecone_ratelimit.is_resource_exhausted(ApiException(400, "Bad Request"))
+    assert not pinecone_ratelimit.is_resource_exhausted(ValueError("vector u1:s1:1429:user has 4290 bytes"))
@@ -0,0 +1,141 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.services.semantic_cache import SemanticCache
+
+
+def _unit(*values):
+    vec = np.zeros(8, dtype=np.float32)
+    vec[: len(values)] = values
+    return vec
+
+
+def test_hit_on_near_duplicate_query_and_miss_on_different_one():
+    cache = SemanticCache(threshold=0.95)
+    part = ("user:u1", "memory", 5)
+    cache.set(part, _unit(1.0, 0.0), ["likes pizza"])
+
+    assert cache.get(part, _unit(1.0, 0.05)) == ["likes pizza"]
+    assert cache.get(part, _unit(0.0, 1.0)) is None
+    # Other partitions never see the entry
+    assert cache.get(("user:u2", "memory", 5), _unit(1.0, 0.0)) is None
+
+
+def test_lru_eviction_and_ttl():
+    cache = SemanticCache(threshold=0.95, max_size=2)
+    part = ("user:u1", "message", 3)
+    cache.set(part, _unit(1.0), "a")
+    cache.set(part, _unit(0.0, 1.0), "b")
+    assert cache.get(part, _unit(1.0)) == "a"  # refresh "a"
+    cache.set(part, _unit(0.0, 0.0, 1.0), "c")  # evicts "b"
+
+    assert len(cache) == 2
+    assert cache.get(part, _unit(0.0, 1.0)) is None
+    assert cache.get(part, _unit(1.0)) == "a"
+
+    expired = SemanticCache(ttl_seconds=-1)
+    expired.set(part, _unit(1.0), "stale")
+    assert expired.get(part, _unit(1.0)) is None
+
+
+def test_invalidate_by_namespace_and_kind():
+    cache = SemanticCache()
+    cache.set(("user:u1", "memory", 5), _unit(1.0), ["m"])
+    cache.set(("user:u1", "message", 3), _unit(1.0), "t")
+
+    cache.invalidate("user:u1", "memory")
+    assert cache.get(("user:u1", "memory", 5), _unit(1.0)) is None
+    assert cache.get(("user:u1", "message", 3), _unit(1.0)) == "t"
+
+    cache.invalidate("user:u1")
+    assert len(cache) == 0
+
+
+def test_document_search_and_near_duplicate_update():
+    docs = SemanticCache(threshold=0.40, dedup_threshold=0.95)
+    part = ("user:u1", "message")
+    docs.set(part, _unit(1.0, 0.2), "pizza on friday")
+    docs.set(part, _unit(1.0, 0.21), "pizza on friday!")  # near-duplicate: replaced, not added
+    docs.set(part, _unit(0.6, 1.0), "pasta sometimes")
+    docs.set(part, _unit(0.0, 0.0, 1.0), "unrelated")
+
+    assert len(docs) == 3
+    assert docs.search(part, _unit(1.0), k=3) == ["pizza on friday!", "pasta sometimes"]
+    assert docs.search(part, _unit(1.0), k=1) == ["pizza on friday!"]
+
+
+def test_dimension_change_and_expiry_keep_bookkeeping_consistent():
+    cache = SemanticCache(threshold=0.95, max_size=2)
+    part = ("user:u1", "memory", 5)
+    cache.set(part, np.ones(4, dtype=np.float32), "dim4")
+    cache.set(part, np.ones(8, dtype=np.float32), "dim8")  # replaces the dim-4 partition
+    assert len(cache) == 1
+
+    expiring = SemanticCache(ttl_seconds=-1)
+    expiring.set(part, _unit(1.0), "stale")
+    assert expiring.get(part, _unit(1.0)) is None
+    assert len(expiring) == 0
+    assert part not in expiring._partitions
+
+
+def _exercise_partition_backend():
+    from app.services.semantic_cache import _Partition
+
+    rng = np.random.default_rng(3)
+    vecs = rng.normal(size=(40, 8)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    part = _Partition(8)
+    for i, vec in enumerate(vecs):
+        part.add(i, vec, f"r{i}")
+
+    def expected(query, k):
+        sims = part.vectors @ query
+        return [int(r) for r in np.argsort(-sims)[:k]]
+
+    query = vecs[5]
+    assert [row for row, _ in part.top(query, 3)] == expected(query, 3)
+
+    # Removal keeps rows aligned with entry ids (applied in place to a faiss mirror)
+    part.remove(5)
+    part.remove(0)
+    top = part.top(query, 3)
+    assert [row for row, _ in top] == expected(query, 3)
+    assert all(part.results[row][0] != "r5" for row, _ in top)
+
+    # In-place update marks the mirror stale; the next lookup sees the new vector
+    part.replace(10, query, "updated")
+    row, sim = part.top(query, 1)[0]
+    assert part.results[row][0] == "updated" and sim == pytest.approx(1.0)
+    return part
+
+
+def test_partition_lookups_with_numpy_backend(monkeypatch):
+    from app.services import semantic_cache
+
+    monkeypatch.setattr(semantic_cache, "faiss", None)
+    part = _exercise_partition_backend()
+    assert part.index is None
+
+
+def test_partition_lookups_with_faiss_backend(monkeypatch):
+    from app.services import semantic_cache
+
+    real_faiss = pytest.importorskip("faiss")
+    monkeypatch.setattr(semantic_cache, "faiss", real_faiss)
+    monkeypatch.setattr(semantic_cache, "FAISS_MIN_ENTRIES", 8)
+    part = _exercise_partition_backend()
+    assert part.index is not None and not part.index_stale
+    assert part.index.ntotal == len(part.entry_ids)
+
+
+def test_small_partitions_skip_faiss(monkeypatch):
+    from app.services import semantic_cache
+
+    monkeypatch.setattr(semantic_cache, "FAISS_MIN_ENTRIES", 1024)
+    cache = SemanticCache(threshold=0.95, max_size=4)
+    part = ("user:u1", "memory", 5)
+    for i in range(6):  # full cache: every set evicts
+        cache.set(part, _unit(1.0, float(i)), i)
+        cache.get(part, _unit(1.0, float(i)))
+    assert cache._partitions[part].index is None